@@ -1,8 +1,33 @@
+import importlib
 import importlib.metadata
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .consumer import Consumer, filtrate
+    from .outbound import Outbound, Session
+    from .inbound import Inbound
+    from .parser import ESLEvent
+
+_lazy_imports = {
+    "Inbound": ".inbound",
+    "Consumer": ".consumer",
+    "filtrate": ".consumer",
+    "Outbound": ".outbound",
+    "Session": ".outbound",
+    "ESLEvent": ".parser",
+}
+
+
+def __getattr__(name: str) -> Any:
+    """Import public objects only when they are first accessed (PEP 562)."""
+    if name in _lazy_imports:
+        module = importlib.import_module(_lazy_imports[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-from .consumer import Consumer, filtrate
-from .outbound import Outbound, Session, ESLEvent
-from .inbound import Inbound
 
 __all__ = ["Inbound", "Consumer", "filtrate", "Outbound", "Session", "ESLEvent"]
 __version__ = importlib.metadata.version("genesis")
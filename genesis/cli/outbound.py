@@ -13,7 +13,7 @@ from genesis.cli import watcher
 from genesis.logger import logger
 from genesis.outbound import Outbound
 from genesis.cli.exceptions import CLIExcpetion
-from genesis.cli.utils import complete_log_levels
+from genesis.cli.utils import complete_log_levels, run_app
 from genesis.cli.discover import get_import_string
 
 
@@ -134,8 +134,7 @@ async def _run_with_reload(app: Outbound, path: Path) -> None:
 
     try:
         await consume(queue)
-        while True:
-            await asyncio.sleep(1)
+        await loop.create_future()
     except KeyboardInterrupt:
         observer.stop()
 
@@ -175,9 +174,9 @@ def _run(
         logger.setLevel(levels.get(loglevel.upper(), logging.INFO))
 
         if reload:
-            asyncio.run(_run_with_reload(app, path))
+            run_app(_run_with_reload(app, path))
         else:
-            asyncio.run(app.start())
+            run_app(app.start())
 
     except CLIExcpetion as e:
         logger.error(e)
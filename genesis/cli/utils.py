@@ -1,5 +1,9 @@
+from typing import Any, Coroutine
+import asyncio
 import logging
 
+from genesis.logger import logger
+
 
 def complete_log_levels(incomplete: str):
     """Autocompletion for log levels."""
@@ -8,3 +12,18 @@ def complete_log_levels(incomplete: str):
     for item in levels:
         if item.startswith(incomplete):
             yield item
+
+
+def run_app(main: Coroutine[Any, Any, Any]) -> Any:
+    """Run the coroutine on uvloop when it is installed, otherwise on asyncio."""
+    try:
+        import uvloop
+    except ImportError:
+        return asyncio.run(main)
+
+    # uvloop.run only exists from uvloop 0.18 on
+    if not hasattr(uvloop, "run"):
+        return asyncio.run(main)
+
+    logger.debug("Using uvloop as event loop.")
+    return uvloop.run(main)
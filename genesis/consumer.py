@@ -106,9 +106,18 @@ class Consumer:
         return decorator
 
     async def wait(self) -> None:
-        while bool(self.protocol.is_connected):
-            logger.debug("Wait to receive new events...")
-            await asyncio.sleep(1)
+        """Block until the connection is closed or its event consumer ends."""
+        logger.debug("Wait to receive new events...")
+        disconnection = asyncio.create_task(self.protocol.disconnection_event.wait())
+        # The consumer outlives the producer until it has handled every
+        # event read before the connection dropped.
+        consumer = self.protocol.consumer
+        pending = {disconnection, *((consumer,) if consumer else ())}
+
+        try:
+            await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            disconnection.cancel()
 
     async def start(self) -> None:
         """Method called to request the freeswitch to start sending us the appropriate events."""
@@ -117,21 +126,27 @@ class Consumer:
                 logger.debug("Asking freeswitch to send us all events.")
                 await protocol.send("events plain ALL")
 
+                filters = []
+
                 for event in protocol.handlers.keys():
                     logger.debug(
-                        f"Requesting freeswitch to filter events of type '{event}'."
+                        "Requesting freeswitch to filter events of type '%s'.", event
                     )
 
                     if event.isupper():
                         logger.debug(
-                            f"Send command to filtrate events with name: '{event}'."
+                            "Send command to filtrate events with name: '%s'.", event
                         )
-                        await protocol.send(f"filter Event-Name {event}")
+                        filters.append(protocol.send(f"filter Event-Name {event}"))
                     else:
                         logger.debug(
-                            f"Send command to filtrate events with subclass: '{event}'."
+                            "Send command to filtrate events with subclass: '%s'.",
+                            event,
                         )
-                        await protocol.send(f"filter Event-Subclass {event}")
+                        filters.append(protocol.send(f"filter Event-Subclass {event}"))
+
+                # Replies come back in order, so the filters can share one round trip
+                await asyncio.gather(*filters)
 
                 await self.wait()
 
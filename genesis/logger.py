@@ -75,7 +75,7 @@ def setup_logger(name: str = __name__) -> logging.Logger:
     logger.addHandler(handler)
     logger.propagate = False
 
-    logger.debug(f"Logger initialized with level: {logging.getLevelName(log_level)}")
+    logger.debug("Logger initialized with level: %s", logging.getLevelName(log_level))
     return logger
 
 
@@ -7,14 +7,23 @@ ESL implementation used for outgoing connections on freeswitch.
 
 from __future__ import annotations
 
-from asyncio import StreamReader, StreamWriter, Queue, start_server, Event, wait_for
+from asyncio import (
+    StreamReader,
+    StreamWriter,
+    Future,
+    start_server,
+    get_running_loop,
+    gather,
+    wait_for,
+)
 from typing import Optional, Union, Dict, Literal
 from collections.abc import Callable, Coroutine
-from functools import partial
 from pprint import pformat
 from uuid import uuid4
+import logging
 import socket
 
+from genesis.exceptions import ConnectionError
 from genesis.protocol import Protocol
 from genesis.parser import ESLEvent
 from genesis.logger import logger
@@ -39,7 +48,7 @@ class Session(Protocol):
         self.context: Dict[str, str] = dict()
         self.reader = reader
         self.writer = writer
-        self.fifo = Queue()
+        self._pending_execute: Dict[str, Future] = dict()
 
     async def __aenter__(self) -> Session:
         """Interface used to implement a context manager."""
@@ -50,60 +59,69 @@ class Session(Protocol):
         """Interface used to implement a context manager."""
         await self.stop()
 
-    async def _awaitable_complete_command(
-        self, event_uuid: str, timeout: Optional[int] = None
-    ) -> Event:
-        """
-        Create an event that will be set when a command completes.
+    def _on_execute_complete(self, event: ESLEvent) -> None:
+        """Resolve the blocked command that the event belongs to."""
+        future = self._pending_execute.pop(event.get("Application-UUID"), None)
 
-        Args:
-            event_uuid: UUID to track the specific command execution.
-            timeout: Optional timeout in seconds for the command to complete.
+        if future is not None:
+            logger.debug("Received channel execute complete event: %s", event)
 
-        Raises:
-            asyncio.TimeoutError: if the command does not complete within the timeout period.
+            if not future.done():
+                future.set_result(event)
 
-        Returns:
-            Event that will be set when command completes.
-        """
-        semaphore = Event()
+    def _on_hangup_complete(self, event: ESLEvent) -> None:
+        """Resolve every blocked command once the channel hangs up."""
+        if self._pending_execute and self.context.get(
+            "Channel-Unique-ID", None
+        ) == event.get("Unique-ID"):
+            logger.debug("Received hangup event: %s", event)
 
-        handlers = {}
+            pending = list(self._pending_execute.values())
+            self._pending_execute.clear()
 
-        async def cleanup():
-            for key, value in handlers.items():
-                self.remove(key, value)
+            for future in pending:
+                if not future.done():
+                    future.set_result(event)
 
-        async def channel_execute_complete_handler(session: Session, event: ESLEvent):
-            logger.debug(f"Received channel execute complete event: {event}")
+    def _discard_pending(self) -> None:
+        """Also fail the blocked commands, their completion can never arrive."""
+        super()._discard_pending()
 
-            if "Application-UUID" in event and event["Application-UUID"] == event_uuid:
-                await session.fifo.put(event)
-                semaphore.set()
-                await cleanup()
+        pending = list(self._pending_execute.values())
+        self._pending_execute.clear()
 
-        # Handler for CHANNEL_HANGUP_COMPLETE event to ensure we don't miss it
-        # if the call is hung up before the command completes
-        async def channel_hangup_complete_handler(session: Session, event: ESLEvent):
-            logger.debug(f"Received hangup event: {event}")
+        for future in pending:
+            if not future.done():
+                future.set_exception(ConnectionError())
 
-            if (
-                "Unique-ID" in event
-                and session.context.get("Channel-Unique-ID", None) == event["Unique-ID"]
-            ):
-                await session.fifo.put(event)
-                semaphore.set()
-                await cleanup()
+    _event_hooks = {
+        "CHANNEL_EXECUTE_COMPLETE": _on_execute_complete,
+        "CHANNEL_HANGUP_COMPLETE": _on_hangup_complete,
+    }
 
-        handlers["CHANNEL_EXECUTE_COMPLETE"] = channel_execute_complete_handler
-        handlers["CHANNEL_HANGUP_COMPLETE"] = channel_hangup_complete_handler
+    async def _awaitable_complete_command(self, event_uuid: str) -> Future:
+        """
+        Create a future that will be resolved when a command completes.
+
+        Args:
+            event_uuid: UUID to track the specific command execution.
+
+        Returns:
+            Future resolved with the event that completed the command.
+        """
+        future = get_running_loop().create_future()
+        self._pending_execute[event_uuid] = future
 
-        for key, value in handlers.items():
-            self.on(key, value)
+        def cleanup(_: Future) -> None:
+            if self._pending_execute.get(event_uuid) is future:
+                del self._pending_execute[event_uuid]
 
-        logger.debug(f"Register event handler for Application-UUID: {event_uuid}")
+        # Also forgets the command when the caller gives up on a timeout
+        future.add_done_callback(cleanup)
 
-        return wait_for(semaphore, timeout=timeout)
+        logger.debug("Register event handler for Application-UUID: %s", event_uuid)
+
+        return future
 
     async def sendmsg(
         self,
@@ -143,52 +161,56 @@ class Session(Protocol):
 
         Raises:
             asyncio.TimeoutError: if the command does not complete within the timeout period.
+            ConnectionError: if the connection drops before a blocking command completes.
 
         Returns:
             ESLEvent: The event received from FreeSWITCH after executing the command.
         """
-        if uuid:
-            cmd = f"sendmsg {uuid}"
-        else:
-            cmd = "sendmsg"
-
-        cmd += f"\ncall-command: {command}"
+        lines = [f"sendmsg {uuid}" if uuid else "sendmsg", f"call-command: {command}"]
 
         # Generate event_uuid if not provided and command is execute
         if command == "execute":
-            cmd += f"\nexecute-app-name: {application}"
+            lines.append(f"execute-app-name: {application}")
             if data:
-                cmd += f"\nexecute-app-arg: {data}"
+                lines.append(f"execute-app-arg: {data}")
 
-            event_uuid = event_uuid or str(uuid4())
+            event_uuid = event_uuid or uuid4().hex
 
-            cmd += f"\nEvent-UUID: {event_uuid}"
+            lines.append(f"Event-UUID: {event_uuid}")
 
         if lock:
-            cmd += f"\nevent-lock: true"
+            lines.append("event-lock: true")
 
         if command == "hangup":
-            cmd += f"\nhangup-cause: {data}"
+            lines.append(f"hangup-cause: {data}")
 
         if headers:
-            for key, value in headers.items():
-                cmd += f"\n{key}: {value}"
+            lines.extend(f"{key}: {value}" for key, value in headers.items())
+
+        cmd = "\n".join(lines)
 
-        logger.debug(f"Send command to freeswitch: '{cmd}'.")
+        logger.debug("Send command to freeswitch: '%s'.", cmd)
 
         if block and command == "execute":
             logger.debug(
-                f"Waiting for command completion with Application-UUID: {event_uuid}"
-            )
-            command_is_complete = await self._awaitable_complete_command(
-                event_uuid, timeout
-            )
-            response = await self.send(cmd)
-            logger.debug(
-                f"Recived reponse of execute command with block: {pformat(response)}"
+                "Waiting for command completion with Application-UUID: %s", event_uuid
             )
-            await command_is_complete.wait()
-            return await self.fifo.get()
+            command_is_complete = await self._awaitable_complete_command(event_uuid)
+
+            try:
+                response = await self.send(cmd)
+            except BaseException:
+                # Nothing will complete a command that was never sent
+                self._pending_execute.pop(event_uuid, None)
+                command_is_complete.cancel()
+                raise
+
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "Recived reponse of execute command with block: %s",
+                    pformat(response),
+                )
+            return await wait_for(command_is_complete, timeout=timeout)
 
         return await self.send(cmd)
 
@@ -214,6 +236,13 @@ class Session(Protocol):
         """Hang up the call associated with the session."""
         return await self.sendmsg("execute", "hangup", cause)
 
+    async def multiset(self, **variables: str) -> ESLEvent:
+        """Set several channel variables with a single multiset command."""
+        arguments = "^^|" + "|".join(
+            f"{key}={value}" for key, value in variables.items()
+        )
+        return await self.sendmsg("execute", "multiset", arguments)
+
     async def playback(
         self, path: str, block=True, timeout: Optional[int] = None
     ) -> ESLEvent:
@@ -238,7 +267,7 @@ class Session(Protocol):
             module += f":{lang}"
 
         arguments = f"{module} {kind} {method} {gender} {text}"
-        logger.debug(f"Arguments used in say command: {arguments}")
+        logger.debug("Arguments used in say command: %s", arguments)
         return await self.sendmsg(
             "execute", "say", arguments, block=block, timeout=timeout
         )
@@ -259,7 +288,6 @@ class Session(Protocol):
         transfer_on_failure: Optional[str] = None,
         sendmsg_timeout: Optional[int] = None,
     ) -> ESLEvent:
-        formatter = lambda value: "" if value is None else str(value)
         ordered_arguments = [
             minimal,
             maximum,
@@ -273,9 +301,13 @@ class Session(Protocol):
             digit_timeout,
             transfer_on_failure,
         ]
-        formated_ordered_arguments = map(formatter, ordered_arguments)
-        arguments = " ".join(formated_ordered_arguments)
-        logger.debug(f"Arguments used in play_and_get_digits command: {arguments}")
+        arguments = " ".join(
+            [
+                "" if argument is None else str(argument)
+                for argument in ordered_arguments
+            ]
+        )
+        logger.debug("Arguments used in play_and_get_digits command: %s", arguments)
 
         return await self.sendmsg(
             "execute",
@@ -304,6 +336,8 @@ class Outbound:
         If true, ask freeswitch to send us all events associated with the session.
     - linger: optional
         If true, asks that the events associated with the session come even after the call hangup.
+    - reuse_port: optional
+        If true, bind with SO_REUSEPORT so several processes can serve the same port.
     """
 
     def __init__(
@@ -313,22 +347,27 @@ class Outbound:
         port: int = 9000,
         events: bool = True,
         linger: bool = True,
+        reuse_port: bool = False,
     ) -> None:
         self.host = host
         self.port = port
         self.app = handler
         self.myevents = events
         self.linger = linger
+        self.reuse_port = reuse_port
         self.server = None
 
     async def start(self, block: bool = True) -> None:
         """Start the application server."""
-        handler = partial(self.handler, self)
         self.server = await start_server(
-            handler, self.host, self.port, family=socket.AF_INET
+            self.handler,
+            self.host,
+            self.port,
+            family=socket.AF_INET,
+            reuse_port=self.reuse_port,
         )
         address = f"{self.host}:{self.port}"
-        logger.info(f"Start application server and listen on '{address}'.")
+        logger.info("Start application server and listen on '%s'.", address)
         if block:
             await self.server.serve_forever()
         else:
@@ -341,23 +380,24 @@ class Outbound:
             self.server.close()
             await self.server.wait_closed()
 
-    @staticmethod
-    async def handler(
-        server: Outbound, reader: StreamReader, writer: StreamWriter
-    ) -> None:
+    async def handler(self, reader: StreamReader, writer: StreamWriter) -> None:
         """Method used to process new connections."""
         async with Session(reader, writer) as session:
             logger.debug("Send command to start handle a call")
             session.context = await session.send("connect")
 
-            if server.myevents:
+            commands = []
+
+            if self.myevents:
                 logger.debug("Send command to receive all call events")
-                await session.send("myevents")
+                commands.append(session.send("myevents"))
 
-            if server.linger:
+            if self.linger:
                 logger.debug("Send linger command to freeswitch")
-                await session.send("linger")
-                session.is_lingering = True
+                commands.append(session.send("linger"))
+
+            await gather(*commands)
+            session.is_lingering = self.linger
 
             logger.debug("Start server session handler")
-            await server.app(session)
+            await self.app(session)
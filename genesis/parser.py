@@ -5,43 +5,108 @@ It implements the intelligence necessary for us to transform freeswitch events i
 """
 
 from typing import Optional
-from collections import UserDict
 from urllib.parse import unquote
 
+# Header names every connection sees over and over. Parsed keys are swapped
+# for these shared strings; unknown names, such as channel variables, are
+# kept as they arrive so they can be freed with their event.
+_HEADER_NAMES = {
+    name: name
+    for name in (
+        "Content-Type",
+        "Content-Length",
+        "Content-Disposition",
+        "Reply-Text",
+        "Job-UUID",
+        "Event-Name",
+        "Event-Subclass",
+        "Event-Sequence",
+        "Event-Date-Local",
+        "Event-Date-GMT",
+        "Event-Date-Timestamp",
+        "Event-Calling-File",
+        "Event-Calling-Function",
+        "Event-Calling-Line-Number",
+        "Event-UUID",
+        "Core-UUID",
+        "FreeSWITCH-Hostname",
+        "FreeSWITCH-Switchname",
+        "FreeSWITCH-IPv4",
+        "FreeSWITCH-IPv6",
+        "Unique-ID",
+        "Channel-State",
+        "Channel-State-Number",
+        "Channel-Call-State",
+        "Channel-Name",
+        "Channel-Unique-ID",
+        "Call-Direction",
+        "Answer-State",
+        "Application",
+        "Application-Data",
+        "Application-Response",
+        "Application-UUID",
+        "Caller-Direction",
+        "Caller-Username",
+        "Caller-Caller-ID-Name",
+        "Caller-Caller-ID-Number",
+        "Caller-Destination-Number",
+        "Caller-Unique-ID",
+        "Caller-Channel-Name",
+        "Caller-Context",
+    )
+}
+
+
+class ESLEvent(dict):
+    __slots__ = ("body",)
 
-class ESLEvent(UserDict):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.body: Optional[str] = None
 
 
 def parse_headers(payload: str) -> ESLEvent:
-    lines = payload.strip().splitlines()
     headers = ESLEvent()
-    buffer = ""
+    key = ""
     value = ""
 
-    for line in lines:
-        if ": " in line:
-            key, value = line.split(": ", 1)
-            buffer = key
+    for line in payload.split("\n"):
+        if line[-1:] == "\r":
+            line = line[:-1]
 
-        else:
-            value += "\n" + line
-            key = buffer
+        if not line:
+            continue
+
+        name, separator, content = line.partition(": ")
 
-        key = unquote(key.strip(), encoding="UTF-8")
-        value = unquote(value.strip(), encoding="UTF-8")
+        if separator:
+            key = name.strip()
+            value = content.strip()
 
-        if ": " in line and key in headers:
-            backup = headers[key]
+            # Most headers carry no escapes, so skip decoding them.
+            if "%" in key:
+                key = unquote(key, encoding="UTF-8")
 
-            if isinstance(backup, str):
+            if "%" in value:
+                value = unquote(value, encoding="UTF-8")
+
+            key = _HEADER_NAMES.get(key, key)
+            backup = headers.get(key)
+
+            if backup is None:
+                headers[key] = value
+            elif isinstance(backup, str):
                 headers[key] = [backup, value]
             else:
-                headers[key] = [*backup, value]
+                backup.append(value)
 
         else:
+            # Continuation of a multiline value, such as an SDP body.
+            value = (value + "\n" + line).strip()
+
+            if "%" in value:
+                value = unquote(value, encoding="UTF-8")
+
             headers[key] = value
 
     return headers
@@ -6,35 +6,120 @@ Here we will group what is common to the ESL client for inbound and outbound con
 """
 
 from asyncio import (
+    IncompleteReadError,
     iscoroutinefunction,
     StreamWriter,
     StreamReader,
     create_task,
-    to_thread,
+    current_task,
+    gather,
+    get_running_loop,
     Event,
-    Queue,
+    Future,
     Task,
 )
-from typing import List, Dict, Optional, Callable, Coroutine, Any, Union
+from typing import (
+    Deque,
+    List,
+    Dict,
+    Set,
+    Tuple,
+    Optional,
+    Callable,
+    Coroutine,
+    Any,
+    ClassVar,
+    Union,
+)
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
 from abc import ABC
+import contextvars
 import logging
+import sys
 
 from genesis.exceptions import UnconnectedError, ConnectionError
 from genesis.parser import parse_headers, ESLEvent
 from genesis.logger import logger, TRACE_LEVEL_NUM
 
+if sys.version_info >= (3, 12):
+    # Handlers that finish without awaiting never get scheduled on the loop
+    from asyncio import eager_task_factory
+else:
+    eager_task_factory = None
+
+# Shared by every connection, so the number of handler threads stays bounded
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _sync_handler_executor() -> ThreadPoolExecutor:
+    """Return the thread pool that runs synchronous handlers, creating it once."""
+    global _executor
+
+    if _executor is None:
+        _executor = ThreadPoolExecutor(thread_name_prefix="genesis")
+
+    return _executor
+
+
+# Bodies of these messages are data, never a block of event headers
+RAW_BODY_CONTENT_TYPES = frozenset(("api/response", "text/rude-rejection", "log/data"))
+# Messages after which freeswitch drops the connection
+DISCONNECT_CONTENT_TYPES = frozenset(("text/rude-rejection", "text/disconnect-notice"))
+
+
+def _end_of_headers(buffer: bytearray, start: int) -> int:
+    """Return where the body starts after a header block, or -1 if incomplete."""
+    lf = buffer.find(b"\n\n", start)
+
+    # Lines may also end in CRLF. Such a block cannot run past an LF blank
+    # line, so only the bytes before it need a second look.
+    crlf = buffer.find(b"\n\r\n", start, len(buffer) if lf == -1 else lf)
+
+    if crlf != -1:
+        return crlf + 3
+
+    return -1 if lf == -1 else lf + 2
+
 
 class Protocol(ABC):
+    __slots__ = (
+        "events",
+        "commands",
+        "events_ready",
+        "is_connected",
+        "is_lingering",
+        "authentication_event",
+        "disconnection_event",
+        "producer",
+        "consumer",
+        "reader",
+        "writer",
+        "_buffer",
+        "handlers",
+        "_dispatch",
+        "_tasks",
+        "__weakref__",
+    )
+
+    # Event handlers a subclass needs for its own bookkeeping. They run
+    # inline, before and regardless of the handlers registered with on().
+    _event_hooks: ClassVar[Dict[str, Callable[[Any, ESLEvent], None]]] = {}
+
     def __init__(self):
-        self.events = Queue()
-        self.commands = Queue()
+        self.events: Deque[ESLEvent] = deque()
+        self.commands: Deque[Future] = deque()
+        self.events_ready = Event()
         self.is_connected = False
         self.is_lingering = False
         self.authentication_event = Event()
+        self.disconnection_event = Event()
+        self.disconnection_event.set()
         self.producer: Optional[Task] = None
         self.consumer: Optional[Task] = None
         self.reader: Optional[StreamReader] = None
         self.writer: Optional[StreamWriter] = None
+        self._buffer = bytearray()
         self.handlers: Dict[
             str,
             List[
@@ -44,10 +129,16 @@ class Protocol(ABC):
                 ]
             ],
         ] = {}
+        self._dispatch: Dict[
+            str, Tuple[Tuple[Callable[[ESLEvent], Any], bool], ...]
+        ] = {}
+        self._tasks: Set[Future] = set()
 
     async def start(self) -> None:
         """Initiates a connection to a freeswitch."""
         self.is_connected = True
+        self.disconnection_event.clear()
+        self._buffer.clear()
 
         logger.debug("Create tasks to work with ESL events.")
         self.producer = create_task(self.handler())
@@ -60,199 +151,313 @@ class Protocol(ABC):
             self.writer.close()
 
         self.is_connected = False
-
-        if self.producer and not self.producer.cancelled():
-            logger.debug("Cancel event producer task.")
-            self.producer.cancel()
-
-        if self.consumer and not self.consumer.cancelled():
-            logger.debug("Cancel event consumer task.")
-            self.consumer.cancel()
+        self.disconnection_event.set()
+        self._discard_pending()
+
+        # The consumer calls stop() itself on disconnect notices, and a task
+        # cannot wait for itself; it leaves its loop once we return.
+        current = current_task()
+        tasks = {
+            name: task
+            for name, task in (("producer", self.producer), ("consumer", self.consumer))
+            if task and task is not current
+        }
+
+        logger.debug("Cancel event producer and consumer tasks.")
+        for task in tasks.values():
+            task.cancel()
+
+        results = await gather(*tasks.values(), return_exceptions=True)
+
+        # A task that crashed before we cancelled it is only reported here.
+        for name, result in zip(tasks, results):
+            if isinstance(result, Exception):
+                logger.error("Event %s task failed: %r", name, result, exc_info=result)
+
+    def _discard_pending(self) -> None:
+        """Fail commands still waiting for a reply and drop unconsumed events."""
+        commands = list(self.commands)
+        self.commands.clear()
+        self.events.clear()
+
+        for response in commands:
+            if not response.done():
+                response.set_exception(ConnectionError())
+
+    async def _read_frame(self) -> Tuple[ESLEvent, Optional[str]]:
+        """Read one message, its headers parsed and its body when it has one."""
+        buffer = self._buffer
+        reader = self.reader
+
+        # Several messages often arrive in a single chunk, then only the
+        # first one of them has to wait on the stream.
+        start = 0
+        while (header_end := _end_of_headers(buffer, start)) == -1:
+            start = max(len(buffer) - 2, 0)
+            chunk = await reader.read(65536)
+            if not chunk:
+                raise IncompleteReadError(bytes(buffer), None)
+            buffer += chunk
+
+        request = buffer[:header_end].decode("utf-8")
+        logger.trace("Complete message received: %r", request)
+
+        event = parse_headers(request)
+
+        if "Content-Length" not in event:
+            del buffer[:header_end]
+            return event, None
+
+        content_length = event["Content-Length"]
+
+        try:
+            length = int(content_length)
+        except ValueError:
+            # Get the total length from the first Content-Length header
+            length = int(content_length.split("\n")[0])
+
+        logger.trace("Total content length: %d bytes", length)
+
+        end = header_end + length
+        while len(buffer) < end:
+            chunk = await reader.read(65536)
+            if not chunk:
+                raise IncompleteReadError(bytes(buffer), end)
+            buffer += chunk
+
+        # Decoded here so that a malformed body ends the connection like any
+        # other unreadable frame.
+        content = buffer[header_end:end].decode("utf-8")
+        del buffer[:end]
+        return event, content
 
     async def handler(self) -> None:
         """Defines intelligence to treat received events."""
-        while self.is_connected:
-            request = None
-            buffer = ""
+        append = self.events.append
+        ready = self.events_ready
 
+        try:
             while self.is_connected:
                 try:
-                    content = await self.reader.readline()
-                    buffer += content.decode("utf-8")
-                except Exception as e:
-                    logger.error(f"Error reading from stream. {str(e)}")
-                    self.is_connected = False
-                    break
+                    event, complete_content = await self._read_frame()
 
-                if buffer[-2:] == "\n\n" or buffer[-4:] == "\r\n\r\n":
-                    request = buffer
-                    logger.trace(f"Complete message received: {repr(request)}")
+                except IncompleteReadError:
+                    logger.debug("Connection closed by freeswitch.")
                     break
 
-            if not request or not self.is_connected:
-                break
+                except Exception as e:
+                    logger.error("Error reading from stream. %s", e)
+                    break
 
-            event = parse_headers(request)
+                if not self.is_connected:
+                    break
 
-            if "Content-Length" in event:
-                # Get the total length from the first Content-Length header
-                length = int(event["Content-Length"].split("\n")[0])
-                logger.trace(f"Total content length: {length} bytes")
+                if complete_content is not None:
+                    logger.trace("Received complete data: %s", complete_content)
+                    contentType = event.get("Content-Type", None)
 
-                # Read the complete data
-                data = await self.reader.readexactly(length)
-                logger.trace(f"Received complete data: {data}")
-                complete_content = data.decode("utf-8")
-                contentType = event.get("Content-Type", None)
+                    if contentType:
+                        logger.trace("Check content type of event: %s", event)
 
-                if contentType:
-                    logger.trace(f"Check content type of event: {event}")
+                        if contentType not in RAW_BODY_CONTENT_TYPES:
+                            # Try to split headers and body
+                            separator = complete_content.find("\n\n")
 
-                    if contentType not in [
-                        "api/response",
-                        "text/rude-rejection",
-                        "log/data",
-                    ]:
-                        # Try to split headers and body
-                        if "\n\n" in complete_content:
-                            headers_part, body = complete_content.split("\n\n", 1)
+                            if separator != -1:
+                                headers_part = complete_content[:separator]
+                                body = complete_content[separator + 2 :]
 
-                            # Here we check for multiple events in one message (can happen if event-lock is set)
-                            event_parts = []
+                                # Here we check for multiple events in one message (can happen if event-lock is set)
+                                event_parts = []
 
-                            if "event-lock: true" in headers_part.lower():
-                                # Split the string on "Event-Name: "
-                                parts = headers_part.split("\nEvent-Name: ")
+                                if "event-lock: true" in headers_part.lower():
+                                    # Split the string on "Event-Name: "
+                                    parts = headers_part.split("\nEvent-Name: ")
 
-                                if len(parts) > 1:
-                                    event_parts = [parts[0]]
+                                    if len(parts) > 1:
+                                        event_parts = [parts[0]]
 
-                                    for part in parts[1:]:
-                                        event_parts.append(f"Event-Name: {part}")
+                                        for part in parts[1:]:
+                                            event_parts.append(f"Event-Name: {part}")
 
-                                    logger.debug(
-                                        f"Split locked event into {len(event_parts)} separate events"
-                                    )
-                            else:
-                                event_parts = [headers_part]
-
-                            # Process each event part
-                            for idx, event_str in enumerate(event_parts):
-                                if idx == 0:
-                                    # First event is the original event
-                                    additional_headers = parse_headers(event_str)
-                                    event.update(additional_headers)
-                                    event.body = body
-                                    await self.events.put(event)
+                                        logger.debug(
+                                            "Split locked event into %d separate events",
+                                            len(event_parts),
+                                        )
                                 else:
-                                    # More events are new events
-                                    new_event = parse_headers(event_str)
-                                    # Copy some headers from the original event
-                                    for key in ["Content-Length", "Content-Type"]:
-                                        if key in event:
-                                            new_event[key] = event[key]
-                                    new_event.body = body
-                                    await self.events.put(new_event)
-                            continue  # Skip the final event.put
+                                    event_parts = [headers_part]
+
+                                # Process each event part
+                                for idx, event_str in enumerate(event_parts):
+                                    if idx == 0:
+                                        # First event is the original event
+                                        additional_headers = parse_headers(event_str)
+                                        event.update(additional_headers)
+                                        event.body = body
+                                        append(event)
+                                        ready.set()
+                                    else:
+                                        # More events are new events
+                                        new_event = parse_headers(event_str)
+                                        # Copy some headers from the original event
+                                        for key in ["Content-Length", "Content-Type"]:
+                                            if key in event:
+                                                new_event[key] = event[key]
+                                        new_event.body = body
+                                        append(new_event)
+                                        ready.set()
+                                continue  # Skip the final append
 
+                            else:
+                                # If no clear header/body separation, treat everything as body
+                                event.body = complete_content
                         else:
-                            # If no clear header/body separation, treat everything as body
                             event.body = complete_content
                     else:
                         event.body = complete_content
-                else:
-                    event.body = complete_content
 
-            await self.events.put(event)
+                append(event)
+                ready.set()
+        finally:
+            # Frames already read are still handled; the consumer winds the
+            # connection down once it has drained them.
+            self.is_connected = False
+            ready.set()
 
     async def consume(self) -> None:
         """Arm all event processors."""
-        while self.is_connected:
-            event = await self.events.get()
+        loop = get_running_loop()
+        events = self.events
+        ready = self.events_ready
+        commands = self.commands
+        hooks = self._event_hooks
+
+        try:
+            while True:
+                if not events:
+                    if not self.is_connected:
+                        break
+
+                    ready.clear()
+                    await ready.wait()
+                    continue
+
+                event = events.popleft()
+                tracing = logger.isEnabledFor(TRACE_LEVEL_NUM)
+                content_type = event.get("Content-Type", None)
 
-            try:
-                if logger.isEnabledFor(TRACE_LEVEL_NUM):
-                    logger.trace(f"Received an event: '{event}'.")
-
-                else:
-                    if logger.isEnabledFor(logging.DEBUG):
-                        name = event.get("Event-Name", None)
-                        uuid = event.get("Unique-ID", None)
-
-                        if uuid:
-                            logger.debug(
-                                f"Received an event: '{name}' for call '{uuid}'. "
-                            )
+                try:
+                    if tracing:
+                        logger.trace("Received an event: '%s'.", event)
 
-                            if name == "CHANNEL_EXECUTE_COMPLETE":
-                                application = event.get("Application")
-                                response = event.get("Application-Response")
+                    else:
+                        if logger.isEnabledFor(logging.DEBUG):
+                            name = event.get("Event-Name", None)
+                            uuid = event.get("Unique-ID", None)
 
+                            if uuid:
                                 logger.debug(
-                                    f"Application: '{application}' - Response: '{response}'."
+                                    "Received an event: '%s' for call '%s'. ",
+                                    name,
+                                    uuid,
                                 )
 
-                        else:
-                            if name:
-                                logger.debug(f"Received an event: '{name}'.")
-
-                            elif "Content-Type" in event and event["Content-Type"] in [
-                                "command/reply",
-                                "auth/request",
-                            ]:
-                                reply = event.get("Reply-Text", None)
+                                if name == "CHANNEL_EXECUTE_COMPLETE":
+                                    application = event.get("Application")
+                                    response = event.get("Application-Response")
 
-                                if reply and event["Content-Type"] == "command/reply":
                                     logger.debug(
-                                        f"Received an command reply: '{reply}'."
+                                        "Application: '%s' - Response: '%s'.",
+                                        application,
+                                        response,
                                     )
 
-                                if reply and event["Content-Type"] == "auth/request":
-                                    logger.debug(
-                                        f"Received an authentication reply: '{event}'."
-                                    )
+                            else:
+                                if name:
+                                    logger.debug("Received an event: '%s'.", name)
+
+                                elif content_type in ["command/reply", "auth/request"]:
+                                    reply = event.get("Reply-Text", None)
+
+                                    if reply and content_type == "command/reply":
+                                        logger.debug(
+                                            "Received an command reply: '%s'.", reply
+                                        )
+
+                                    if reply and content_type == "auth/request":
+                                        logger.debug(
+                                            "Received an authentication reply: '%s'.",
+                                            event,
+                                        )
 
-            except Exception as e:
-                logger.error(f"Error logging event: {str(e)} - Event: {event}")
-
-            if "Content-Type" in event and event["Content-Type"] == "auth/request":
-                self.authentication_event.set()
-
-            elif "Content-Type" in event and event["Content-Type"] == "command/reply":
-                await self.commands.put(event)
-
-            elif "Content-Type" in event and event["Content-Type"] == "api/response":
-                await self.commands.put(event)
-
-            elif "Content-Type" in event and event["Content-Type"] in [
-                "text/rude-rejection",
-                "text/disconnect-notice",
-            ]:
-                if not (
-                    "Content-Disposition" in event
-                    and event["Content-Disposition"] == "linger"
-                ):
-                    await self.stop()
-
-            identifier = event.get("Event-Name", None)
-
-            if identifier == "CUSTOM":
-                name = event.get("Event-Subclass", None)
-            else:
-                name = identifier
-
-            if name:
-                logger.trace(f"Get all handlers for '{name}'.")
-                specific = self.handlers.get(name, [])
-                generic = self.handlers.get("*", list())
-                handlers = specific + generic
-
-                if handlers:
-                    for handler in handlers:
-                        if iscoroutinefunction(handler):
-                            create_task(handler(event))
+                except Exception as e:
+                    logger.error("Error logging event: %s - Event: %s", e, event)
+
+                if content_type == "auth/request":
+                    self.authentication_event.set()
+
+                elif content_type == "command/reply" or content_type == "api/response":
+                    # Replies come in the order the commands were sent. A sender
+                    # that gave up still owns its slot, so its reply is dropped.
+                    if commands:
+                        response = commands.popleft()
+
+                        if not response.done():
+                            response.set_result(event)
+
+                elif content_type in DISCONNECT_CONTENT_TYPES:
+                    if event.get("Content-Disposition", None) != "linger":
+                        await self.stop()
+
+                if hooks:
+                    hook = hooks.get(event.get("Event-Name", None))
+
+                    if hook:
+                        hook(self, event)
+
+                if not self.handlers:
+                    continue
+
+                identifier = event.get("Event-Name", None)
+
+                if identifier == "CUSTOM":
+                    name = event.get("Event-Subclass", None)
+                else:
+                    name = identifier
+
+                if name:
+                    if tracing:
+                        logger.trace("Get all handlers for '%s'.", name)
+
+                    handlers = self._dispatch.get(name)
+
+                    if handlers is None:
+                        specific = self.handlers.get(name, [])
+                        generic = self.handlers.get("*", list())
+                        handlers = self._dispatch[name] = tuple(
+                            (handler, iscoroutinefunction(handler))
+                            for handler in specific + generic
+                        )
+
+                    for handler, is_coroutine in handlers:
+                        if is_coroutine and eager_task_factory:
+                            task = eager_task_factory(loop, handler(event))
+                        elif is_coroutine:
+                            task = create_task(handler(event))
                         else:
-                            create_task(to_thread(handler, event))
+                            # Threads do not inherit context variables on their own
+                            context = contextvars.copy_context()
+                            task = loop.run_in_executor(
+                                _sync_handler_executor(), context.run, handler, event
+                            )
+
+                        # The loop only keeps weak references to tasks.
+                        self._tasks.add(task)
+                        task.add_done_callback(self._tasks.discard)
+        finally:
+            # Nothing is left to answer the commands still waiting.
+            self._discard_pending()
+            self.disconnection_event.set()
 
     def on(
         self,
@@ -262,8 +467,9 @@ class Protocol(ABC):
         ],
     ) -> None:
         """Associate a handler with an event key."""
-        logger.debug(f"Register handler to '{key}' event.")
+        logger.debug("Register handler to '%s' event.", key)
         self.handlers.setdefault(key, list()).append(handler)
+        self._dispatch.clear()
 
     def remove(
         self,
@@ -273,9 +479,10 @@ class Protocol(ABC):
         ],
     ) -> None:
         """Removes the HANDLER from the list of handlers for the given event KEY name."""
-        logger.debug(f"Remove handler to '{key}' event.")
+        logger.debug("Remove handler to '%s' event.", key)
         if key in self.handlers and handler in self.handlers[key]:
             self.handlers.setdefault(key, list()).remove(handler)
+            self._dispatch.clear()
 
     async def send(self, cmd: str) -> ESLEvent:
         """Method used to send commands to or freeswitch."""
@@ -285,14 +492,18 @@ class Protocol(ABC):
         if self.writer.is_closing():
             raise ConnectionError()
 
-        logger.debug(f"Send command to freeswitch: '{cmd}'.")
-        lines = cmd.splitlines()
+        logger.debug("Send command to freeswitch: '%s'.", cmd)
+        payload = "".join([line + "\n" for line in cmd.splitlines()]) + "\n"
+        self.writer.write(payload.encode("utf-8"))
 
-        for line in lines:
-            self.writer.write((line + "\n").encode("utf-8"))
+        # Claim the slot for our reply before yielding, allowing concurrent sends.
+        response = get_running_loop().create_future()
+        self.commands.append(response)
 
-        self.writer.write("\n".encode("utf-8"))
-        await self.writer.drain()
+        try:
+            await self.writer.drain()
+        except BaseException:
+            response.cancel()
+            raise
 
-        response = await self.commands.get()
-        return response
+        return await response
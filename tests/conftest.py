@@ -10,10 +10,20 @@ from asyncio import (
     Future,
     sleep,
 )
-from typing import Awaitable, Callable, Optional, Dict, Union, List
+from typing import (
+    AsyncIterator,
+    AsyncContextManager,
+    Awaitable,
+    Callable,
+    Optional,
+    Dict,
+    Union,
+    List,
+    Tuple,
+)
 from asyncio.base_events import Server
 from abc import ABC, abstractmethod
-from contextlib import closing
+from contextlib import asynccontextmanager, closing
 from functools import partial
 from textwrap import dedent
 from random import choices
@@ -24,7 +34,7 @@ import socket
 import pytest
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def mod_audio_stream_play() -> str:
     event = dedent(
         """\
@@ -222,7 +232,7 @@ def mod_audio_stream_play() -> str:
     return event
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def heartbeat() -> str:
     event = dedent(
         """\
@@ -257,7 +267,7 @@ def heartbeat() -> str:
     return event
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def channel() -> Dict[str, str]:
     events = dict()
 
@@ -419,7 +429,7 @@ def channel() -> Dict[str, str]:
     return events
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def background_job() -> str:
     event = dedent(
         """\
@@ -447,7 +457,7 @@ def background_job() -> str:
     return event
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def custom() -> str:
     event = dedent(
         """\
@@ -470,7 +480,7 @@ def custom() -> str:
     return event
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def register() -> str:
     event = dedent(
         """\
@@ -506,7 +516,7 @@ def register() -> str:
     return event
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def connect() -> str:
     event = dedent(
         """\
@@ -615,7 +625,7 @@ def connect() -> str:
     return event
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def generic() -> str:
     event = dedent(
         """\
@@ -739,7 +749,7 @@ class Freeswitch(ESLMixin):
                 except RuntimeError:
                     pass
 
-        await sleep(0.00001)
+        await sleep(0)
 
     async def __aenter__(self) -> Awaitable[Server]:
         await self.start()
@@ -852,6 +862,40 @@ async def freeswitch(host, port, password) -> Freeswitch:
     return server
 
 
+Script = Callable[[StreamReader, StreamWriter], Awaitable[None]]
+
+
+@pytest.fixture()
+async def scripted_freeswitch(
+    host, port
+) -> Callable[[Script], AsyncContextManager[Tuple[str, int]]]:
+    """Serve a freeswitch that authenticates any client, then follows a script.
+
+    The script gets the raw stream right after the authentication reply was
+    written, so it can send malformed, fragmented or truncated messages.
+    """
+
+    @asynccontextmanager
+    async def serve(script: Script) -> AsyncIterator[Tuple[str, int]]:
+        async def handler(reader: StreamReader, writer: StreamWriter) -> None:
+            writer.write(b"Content-Type: auth/request\n\n")
+            await reader.readuntil(b"\n\n")
+            writer.write(b"Content-Type: command/reply\nReply-Text: +OK accepted\n\n")
+
+            try:
+                await script(reader, writer)
+            finally:
+                writer.close()
+
+        address = (host(), port())
+        server = await start_server(handler, *address)
+
+        async with server:
+            yield address
+
+    return serve
+
+
 class Dialplan(ESLMixin):
     def __init__(self) -> None:
         self.commands = dict()
@@ -887,7 +931,7 @@ class Dialplan(ESLMixin):
             self.writer.close()
             await self.writer.wait_closed()
 
-        await sleep(0.00001)
+        await sleep(0)
 
 
 @pytest.fixture
@@ -0,0 +1,66 @@
+from textwrap import dedent
+from types import ModuleType
+import sys
+
+import pytest
+from typer.testing import CliRunner
+
+from genesis import Consumer, Outbound
+from genesis.cli import app
+from genesis.cli.utils import run_app
+
+consumer_app = dedent(
+    """\
+    from genesis import Consumer
+
+    app = Consumer("127.0.0.1", 8021, "ClueCon")
+    """
+)
+
+outbound_app = dedent(
+    """\
+    from genesis import Outbound
+
+    async def handler(session):
+        pass
+
+    app = Outbound(handler, "127.0.0.1", 9000)
+    """
+)
+
+
+@pytest.mark.parametrize(
+    "command, cls, source",
+    [
+        ("consumer", Consumer, consumer_app),
+        ("outbound", Outbound, outbound_app),
+    ],
+    ids=["consumer", "outbound"],
+)
+def test_cli_run_starts_the_app(tmp_path, monkeypatch, command, cls, source):
+    started = []
+
+    async def start(self, *args, **kwargs):
+        started.append(self)
+
+    monkeypatch.setattr(cls, "start", start)
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    path = tmp_path / f"cli_{command}_app.py"
+    path.write_text(source)
+
+    result = CliRunner().invoke(app, [command, "run", str(path)])
+
+    assert result.exit_code == 0, result.output
+    assert len(started) == 1, "The command did not start the app"
+    assert isinstance(started[0], cls), "The command started the wrong app"
+
+
+def test_run_app_falls_back_to_asyncio_without_uvloop_run(monkeypatch):
+    # uvloop releases before 0.18 have no run()
+    monkeypatch.setitem(sys.modules, "uvloop", ModuleType("uvloop"))
+
+    async def main():
+        return "done"
+
+    assert run_app(main()) == "done", "The coroutine did not run on asyncio"
@@ -1,13 +1,13 @@
 import asyncio
 
 try:
-    from unittest.mock import AsyncMock, PropertyMock
+    from unittest.mock import AsyncMock
 except ImportError:
-    from mock import AsyncMock, PropertyMock
+    from mock import AsyncMock
 
 import pytest
 
-from genesis import filtrate, Consumer
+from genesis import filtrate, Consumer, ESLEvent
 
 cases = [
     {"decorator": ["key"], "expected": True, "event": {"key": "value"}},
@@ -31,7 +31,18 @@ cases = [
 ]
 
 
-@pytest.mark.parametrize("content", cases)
+@pytest.mark.parametrize(
+    "content",
+    cases,
+    ids=[
+        "key-present",
+        "key-missing",
+        "value-match",
+        "value-mismatch",
+        "regex-match",
+        "regex-mismatch",
+    ],
+)
 @pytest.mark.filterwarnings("ignore: coroutine")
 @pytest.mark.filterwarnings("ignore: There is no current event loop")
 async def test_decorator_behavior(content):
@@ -55,12 +66,21 @@ async def test_decorator_behavior(content):
     assert handler.called == expected, "The handler has stored the expected value"
 
 
+async def test_decorator_accepts_esl_events():
+    handler = AsyncMock()
+    event = ESLEvent({"Event-Name": "HEARTBEAT"})
+
+    await filtrate("Event-Name", "HEARTBEAT")(handler)(event)
+
+    assert handler.called, "The handler was not called for a parsed event"
+
+
 async def test_decorator_not_change_behavior_of_funcion():
     app = Consumer("127.0.0.1", 8021, "ClueCon")
 
     @app.handle("sofia::register")
     async def handle(event):
-        await asyncio.sleep(0.0001)
+        await asyncio.sleep(0)
         return "result"
 
     expected = "result"
@@ -138,21 +158,21 @@ async def test_consumer_wait_method_is_callend(freeswitch):
         future.cancel()
 
 
-async def test_consumer_wait_method_behavior(host, port, password, monkeypatch):
-    spider = AsyncMock()
-    monkeypatch.setattr(asyncio, "sleep", spider)
-
+async def test_consumer_wait_method_behavior(host, port, password):
     address = (host(), port(), password())
     app = Consumer(*address)
+    app.protocol.disconnection_event.clear()
+
+    waiter = asyncio.ensure_future(app.wait())
+    await asyncio.sleep(0)
 
-    app.protocol.is_connected = PropertyMock()
-    app.protocol.is_connected.side_effect = [True, True, False]
-    app.protocol.is_connected.__bool__ = lambda self: self()
+    assert not waiter.done(), "The consumer stopped while the connection was open."
 
-    await app.wait()
+    app.protocol.disconnection_event.set()
+    await asyncio.wait_for(waiter, 1)
 
     message = "The consumer stopped when the connection was closed."
-    assert spider.call_count == 2, message
+    assert waiter.done(), message
 
 
 async def test_receive_background_job_event(freeswitch, background_job):
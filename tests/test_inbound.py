@@ -1,4 +1,5 @@
 import asyncio
+import contextvars
 from textwrap import dedent
 
 try:
@@ -15,6 +16,8 @@ from genesis.exceptions import (
     ConnectionError,
 )
 from genesis import Inbound
+from genesis.protocol import Protocol
+from genesis.logger import logger
 
 
 async def test_send_command_without_connection():
@@ -51,6 +54,166 @@ async def test_inbound_client_send_command(freeswitch):
             assert response["Reply-Text"] == "6943047", message
 
 
+async def test_inbound_client_send_concurrent_commands(freeswitch):
+    async with freeswitch as server:
+        server.oncommand("uptime", "6943047")
+        server.oncommand("hostname", "freeswitch")
+        async with Inbound(*freeswitch.address) as client:
+            uptime, hostname = await asyncio.gather(
+                client.send("uptime"), client.send("hostname")
+            )
+            message = "The answers were not matched to their commands"
+            assert uptime["Reply-Text"] == "6943047", message
+            assert hostname["Reply-Text"] == "freeswitch", message
+
+
+async def test_inbound_client_detects_closed_connection(scripted_freeswitch):
+    async def script(reader, writer):
+        await writer.drain()
+
+    async with scripted_freeswitch(script) as address:
+        async with Inbound(*address, "ClueCon") as client:
+            await asyncio.wait_for(client.disconnection_event.wait(), 1)
+            message = "The client did not notice the closed connection"
+            assert not client.is_connected, message
+
+
+async def test_inbound_client_fails_commands_when_connection_drops(
+    scripted_freeswitch,
+):
+    async def script(reader, writer):
+        await reader.readuntil(b"\n\n")
+
+    async with scripted_freeswitch(script) as address:
+        async with Inbound(*address, "ClueCon") as client:
+            with pytest.raises(ConnectionError):
+                await asyncio.wait_for(client.send("api uptime"), 1)
+
+
+async def test_inbound_client_handles_messages_read_with_the_end_of_stream():
+    body = b"Event-Name: HEARTBEAT\n\n"
+    event = b"Content-Type: text/event-plain\nContent-Length: %d\n\n%s" % (
+        len(body),
+        body,
+    )
+    received = []
+    semaphore = asyncio.Event()
+
+    async def handler(event):
+        received.append(event)
+        if len(received) == 3:
+            semaphore.set()
+
+    client = Inbound("0.0.0.0", 8021, "ClueCon")
+    client.on("HEARTBEAT", handler)
+
+    # Everything, end of stream included, is there before the first read
+    client.reader = asyncio.StreamReader()
+    client.reader.feed_data(
+        b"Content-Type: command/reply\nReply-Text: +OK bye\n\n" + event * 3
+    )
+    client.reader.feed_eof()
+
+    response = asyncio.get_running_loop().create_future()
+    client.commands.append(response)
+
+    await Protocol.start(client)
+    await asyncio.wait_for(client.disconnection_event.wait(), 1)
+    await asyncio.wait_for(semaphore.wait(), 1)
+    await client.stop()
+
+    message = "The reply read before the connection closed was lost"
+    assert response.result()["Reply-Text"] == "+OK bye", message
+    message = "Events read before the connection closed were not handled"
+    assert len(received) == 3, message
+
+
+async def test_inbound_client_restart_discards_unanswered_commands(
+    scripted_freeswitch,
+):
+    async def script(reader, writer):
+        # Never answer anything else, the client gives up on us
+        await reader.read()
+
+    async with scripted_freeswitch(script) as address:
+        client = Inbound(*address, "ClueCon")
+        await client.start()
+
+        command = asyncio.create_task(client.send("api uptime"))
+        await asyncio.sleep(0)
+
+        await client.stop()
+
+        with pytest.raises(ConnectionError):
+            await asyncio.wait_for(command, 1)
+
+        await asyncio.wait_for(client.start(), 1)
+        message = "The restarted client is not connected"
+        assert client.is_connected, message
+        await client.stop()
+
+
+async def test_inbound_client_disconnects_on_undecodable_message(
+    scripted_freeswitch, monkeypatch, caplog
+):
+    body = b"Event-Name: HEARTBEAT\nBroken: \xff\xfe\n\n"
+
+    async def script(reader, writer):
+        await reader.readuntil(b"\n\n")
+        writer.write(b"Content-Type: text/event-plain\n")
+        writer.write(b"Content-Length: %d\n\n%s" % (len(body), body))
+        await writer.drain()
+        await reader.read()
+
+    monkeypatch.setattr(logger, "propagate", True)
+
+    async with scripted_freeswitch(script) as address:
+        async with Inbound(*address, "ClueCon") as client:
+            with pytest.raises(ConnectionError):
+                await asyncio.wait_for(client.send("api uptime"), 1)
+
+            await asyncio.wait_for(client.disconnection_event.wait(), 1)
+            message = "The client is still connected after an unreadable message"
+            assert not client.is_connected, message
+
+    message = "The unreadable message was not reported"
+    assert "Error reading from stream" in caplog.text, message
+
+
+async def test_inbound_client_reads_coalesced_and_fragmented_messages(
+    scripted_freeswitch,
+):
+    async def script(reader, writer):
+        # Follows the authentication reply in the same chunk, the response
+        # body is then split across writes
+        writer.write(b"Content-Type: api/response\nContent-Length: 7\n\n6")
+        await writer.drain()
+        await reader.readuntil(b"\n\n")
+        writer.write(b"943047")
+        await writer.drain()
+        await reader.read()
+
+    async with scripted_freeswitch(script) as address:
+        async with Inbound(*address, "ClueCon") as client:
+            response = await asyncio.wait_for(client.send("api uptime"), 1)
+            message = "The fragmented body was not reassembled"
+            assert response.body == "6943047", message
+
+
+async def test_inbound_client_reads_crlf_terminated_messages(scripted_freeswitch):
+    async def script(reader, writer):
+        await reader.readuntil(b"\n\n")
+        writer.write(b"Content-Type: api/response\r\nContent-Length: 7\r\n\r\n6943047")
+        await writer.drain()
+        await reader.read()
+
+    async with scripted_freeswitch(script) as address:
+        async with Inbound(*address, "ClueCon") as client:
+            response = await asyncio.wait_for(client.send("api uptime"), 1)
+            message = "The CRLF terminated response was not read"
+            assert response.body == "6943047", message
+
+
 async def test_send_api_command_with_large_reponse(freeswitch):
     status = dedent(
         """\
@@ -89,6 +252,44 @@ async def test_event_handler_on_inbound_client(freeswitch, heartbeat):
     assert handler.called, "Event processing did not activate handler"
 
 
+async def test_sync_event_handler_on_inbound_client(freeswitch, heartbeat):
+    async with freeswitch as server:
+        server.events.append(heartbeat)
+        async with Inbound(*freeswitch.address) as client:
+            loop = asyncio.get_running_loop()
+            received = loop.create_future()
+
+            def handler(event):
+                loop.call_soon_threadsafe(received.set_result, event["Event-Name"])
+
+            client.on("HEARTBEAT", handler)
+            await client.send("events plain ALL")
+            got = await asyncio.wait_for(received, 1)
+
+    assert got == "HEARTBEAT", "Event processing did not activate sync handler"
+
+
+async def test_sync_event_handler_sees_context_variables(freeswitch, heartbeat):
+    request = contextvars.ContextVar("request")
+    request.set("call-1001")
+
+    async with freeswitch as server:
+        server.events.append(heartbeat)
+        async with Inbound(*freeswitch.address) as client:
+            loop = asyncio.get_running_loop()
+            received = loop.create_future()
+
+            def handler(event):
+                value = request.get(None)
+                loop.call_soon_threadsafe(received.set_result, value)
+
+            client.on("HEARTBEAT", handler)
+            await client.send("events plain ALL")
+            got = await asyncio.wait_for(received, 1)
+
+    assert got == "call-1001", "The sync handler ran without the caller's context"
+
+
 async def test_custom_event_handler_on_inbound_client(freeswitch, register):
     async with freeswitch as server:
         server.events.append(register)
@@ -120,7 +321,7 @@ async def test_to_remove_event_handler():
     assert handler not in client.handlers["MESSAGE"], "The handler has not been removed"
 
 
-async def test_inbound_client_send_command(freeswitch):
+async def test_inbound_client_send_command_after_writer_closed(freeswitch):
     async with freeswitch:
         async with Inbound(*freeswitch.address) as client:
             with pytest.raises(ConnectionError):
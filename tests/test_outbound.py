@@ -1,10 +1,14 @@
-from asyncio import Queue, Event
+from asyncio import Queue, Event, TimeoutError, wait_for
+from textwrap import dedent
 from typing import Awaitable
+import weakref
+
+import pytest
 
 try:
-    from unittest.mock import AsyncMock
+    from unittest.mock import AsyncMock, call
 except ImportError:
-    from mock import AsyncMock
+    from mock import AsyncMock, call
 
 from genesis import Outbound, Session
 
@@ -132,35 +136,26 @@ async def test_outbound_session_has_context(host, port, dialplan):
     await application.stop()
 
 
-async def test_outbound_session_send_answer_command(
-    host, port, dialplan, monkeypatch, generic
-):
-    spider = AsyncMock()
-    spider.return_value = generic
-
-    semaphore = Event()
-    monkeypatch.setattr(Session, "sendmsg", spider)
-
-    async def handler(session: Session) -> Awaitable[None]:
-        await session.answer()
-        semaphore.set()
-
-    address = (host(), port())
-    application = Outbound(handler, *address)
-
-    await application.start(block=False)
-    await dialplan.start(*address)
-
-    await semaphore.wait()
-
-    await dialplan.stop()
-    await application.stop()
-
-    spider.assert_called_with("execute", "answer")
-
-
-async def test_outbound_session_send_park_command(
-    host, port, dialplan, monkeypatch, generic
+@pytest.mark.parametrize(
+    "method, arguments, expected",
+    [
+        ("answer", {}, ("execute", "answer")),
+        ("park", {}, ("execute", "park")),
+        ("hangup", {}, ("execute", "hangup", "NORMAL_CLEARING")),
+        (
+            "multiset",
+            {"hangup_after_bridge": "false", "park_after_bridge": "true"},
+            (
+                "execute",
+                "multiset",
+                "^^|hangup_after_bridge=false|park_after_bridge=true",
+            ),
+        ),
+    ],
+    ids=["answer", "park", "hangup", "multiset"],
+)
+async def test_outbound_session_send_dialplan_command(
+    host, port, dialplan, monkeypatch, generic, method, arguments, expected
 ):
     spider = AsyncMock()
     spider.return_value = generic
@@ -169,12 +164,11 @@ async def test_outbound_session_send_park_command(
     monkeypatch.setattr(Session, "sendmsg", spider)
 
     async def handler(session: Session) -> Awaitable[None]:
-        await session.park()
+        await getattr(session, method)(**arguments)
         semaphore.set()
 
     address = (host(), port())
     application = Outbound(handler, *address)
-
     await application.start(block=False)
 
     await dialplan.start(*address)
@@ -184,34 +178,8 @@ async def test_outbound_session_send_park_command(
     await dialplan.stop()
     await application.stop()
 
-    spider.assert_called_with("execute", "park")
-
-
-async def test_outbound_session_send_hangup_command(
-    host, port, dialplan, monkeypatch, generic
-):
-    spider = AsyncMock()
-    spider.return_value = generic
-
-    semaphore = Event()
-    monkeypatch.setattr(Session, "sendmsg", spider)
-
-    async def handler(session: Session) -> Awaitable[None]:
-        await session.hangup()
-        semaphore.set()
-
-    address = (host(), port())
-    application = Outbound(handler, *address)
-    await application.start(block=False)
-
-    await dialplan.start(*address)
-
-    await semaphore.wait()
-
-    await dialplan.stop()
-    await application.stop()
-
-    spider.assert_called_with("execute", "hangup", "NORMAL_CLEARING")
+    message = "The command was not sent with the expected arguments"
+    assert spider.call_args == call(*expected), message
 
 
 async def test_outbound_session_sendmsg_parameters(
@@ -272,7 +240,221 @@ async def test_outbound_session_sendmsg_parameters(
     await dialplan.stop()
 
     # Verify all calls were made with correct parameters
-    for case in test_cases:
-        expected_args = case["args"]
-        expected_kwargs = case["kwargs"]
-        spider.assert_any_call(*expected_args, **expected_kwargs)
+    expected = [call(*case["args"], **case["kwargs"]) for case in test_cases]
+    message = "The commands were not sent with the expected parameters"
+    assert spider.call_args_list == expected, message
+
+
+async def test_outbound_session_sendmsg_with_block_waits_for_completion(
+    host, port, dialplan
+):
+    buffer = Queue(maxsize=1)
+    command = "\n".join(
+        [
+            "sendmsg",
+            "call-command: execute",
+            "execute-app-name: playback",
+            "execute-app-arg: /tmp/test.wav",
+            "Event-UUID: test-event-5678",
+        ]
+    )
+    complete = dedent(
+        """\
+        Event-Name: CHANNEL_EXECUTE_COMPLETE
+        Application: playback
+        Application-UUID: test-event-5678
+        Application-Response: FILE PLAYED
+        """
+    )
+    dialplan.oncommand(
+        command,
+        "\n".join(
+            [
+                "Content-Type: command/reply",
+                "Reply-Text: +OK",
+                "",
+                "Content-Type: text/event-plain",
+                f"Content-Length: {len(complete) + 1}",
+                "",
+                complete,
+            ]
+        ),
+    )
+
+    async def handler(session: Session) -> None:
+        event = await session.sendmsg(
+            "execute",
+            "playback",
+            "/tmp/test.wav",
+            event_uuid="test-event-5678",
+            block=True,
+            timeout=1,
+        )
+        await buffer.put(event)
+
+    address = (host(), port())
+    application = Outbound(handler, *address)
+
+    await application.start(block=False)
+    await dialplan.start(*address)
+
+    got = await buffer.get()
+
+    await dialplan.stop()
+    await application.stop()
+
+    assert got["Application-Response"] == "FILE PLAYED", "Completion was not awaited"
+
+
+async def test_outbound_session_sendmsg_with_block_timeout_forgets_command(
+    host, port, dialplan
+):
+    buffer = Queue(maxsize=1)
+    command = "\n".join(
+        [
+            "sendmsg",
+            "call-command: execute",
+            "execute-app-name: playback",
+            "execute-app-arg: /tmp/test.wav",
+            "Event-UUID: test-event-9012",
+        ]
+    )
+    dialplan.oncommand(command, "Content-Type: command/reply\nReply-Text: +OK")
+
+    async def handler(session: Session) -> None:
+        try:
+            await session.sendmsg(
+                "execute",
+                "playback",
+                "/tmp/test.wav",
+                event_uuid="test-event-9012",
+                block=True,
+                timeout=0.01,
+            )
+        except TimeoutError:
+            await buffer.put(dict(session._pending_execute))
+
+    address = (host(), port())
+    application = Outbound(handler, *address)
+
+    await application.start(block=False)
+    await dialplan.start(*address)
+
+    got = await buffer.get()
+
+    await dialplan.stop()
+    await application.stop()
+
+    assert not got, "The timed out command was left pending"
+
+
+async def test_outbound_session_sendmsg_with_block_send_failure_forgets_command(
+    host, port, dialplan
+):
+    buffer = Queue(maxsize=1)
+
+    async def handler(session: Session) -> None:
+        session.writer.close()
+
+        try:
+            await session.sendmsg(
+                "execute",
+                "playback",
+                "/tmp/test.wav",
+                event_uuid="test-event-3456",
+                block=True,
+                timeout=1,
+            )
+        except ConnectionError:
+            await buffer.put(dict(session._pending_execute))
+
+    address = (host(), port())
+    application = Outbound(handler, *address)
+
+    await application.start(block=False)
+    await dialplan.start(*address)
+
+    got = await buffer.get()
+
+    await dialplan.stop()
+    await application.stop()
+
+    assert not got, "The command that failed to send was left pending"
+
+
+async def test_outbound_session_sendmsg_with_block_fails_when_connection_drops(
+    host, port, dialplan, monkeypatch
+):
+    buffer = Queue(maxsize=1)
+    command = "\n".join(
+        [
+            "sendmsg",
+            "call-command: execute",
+            "execute-app-name: playback",
+            "execute-app-arg: /tmp/test.wav",
+            "Event-UUID: test-event-7890",
+        ]
+    )
+    dialplan.oncommand(command, "Content-Type: command/reply\nReply-Text: +OK")
+    process = dialplan.process
+
+    async def process_and_hang_up(writer, request):
+        await process(writer, request)
+
+        # Drop the call while the playback is still running
+        if request == command:
+            writer.close()
+
+    monkeypatch.setattr(dialplan, "process", process_and_hang_up)
+
+    async def handler(session: Session) -> None:
+        try:
+            await session.sendmsg(
+                "execute",
+                "playback",
+                "/tmp/test.wav",
+                event_uuid="test-event-7890",
+                block=True,
+            )
+        except ConnectionError:
+            await buffer.put(dict(session._pending_execute))
+
+    address = (host(), port())
+    application = Outbound(handler, *address)
+
+    await application.start(block=False)
+    await dialplan.start(*address)
+
+    got = await wait_for(buffer.get(), 1)
+
+    await dialplan.stop()
+    await application.stop()
+
+    assert not got, "The command was left pending after the connection dropped"
+
+
+async def test_outbound_session_keeps_user_attributes_and_weak_references():
+    session = Session(None, None)
+    session.caller = "1001"
+    reference = weakref.ref(session)
+
+    assert session.caller == "1001", "The session did not keep its attribute"
+    assert reference() is session, "The session can not be weakly referenced"
+
+
+async def test_outbound_servers_share_port_with_reuse_port(host, port):
+    async def handler(session: Session) -> Awaitable[None]:
+        pass
+
+    address = (host(), port())
+    first = Outbound(handler, *address, reuse_port=True)
+    second = Outbound(handler, *address, reuse_port=True)
+
+    await first.start(block=False)
+    await second.start(block=False)
+
+    assert first.server.is_serving(), "The first server should be listening"
+    assert second.server.is_serving(), "The second server should share the port"
+
+    await second.stop()
+    await first.stop()
@@ -107,3 +107,10 @@ def test_parse_event_with_3_repeated_headers(custom):
     }
 
     assert got == expected, "Event parsing did not happen as expected"
+
+
+def test_parse_headers_with_empty_last_value():
+    got = parse_headers("Event-Name: CUSTOM\r\nvariable_empty: \r\n\r\n")
+    expected = {"Event-Name": "CUSTOM", "variable_empty": ""}
+
+    assert got == expected, "Event parsing did not happen as expected"